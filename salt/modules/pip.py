@@ -73,23 +73,37 @@ of the 2015.5 branch:
    example, cwd: 'C:\\salt\\bin\\scripts'. Sometimes python thinks the single
    back slash is an escape character.
 
+Using uv
+--------
+
+.. versionadded:: Oxygen
+
+If the ``SALT_PIP_USE_UV`` environment variable of the minion is set to ``1``
+and a ``uv`` binary is available, :py:func:`pip.install
+<salt.modules.pip.install>` uses ``uv pip install`` instead of pip whenever
+``bin_env`` is a virtualenv. uv only implements the commonly used pip
+options, so older or legacy options may be rejected. All other functions keep
+using pip, which must still be present to detect its version.
+
 '''
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
 import logging
 import os
-import pkg_resources
 import re
 import shutil
+import stat
 import sys
 import tempfile
+import time
 
 # Import Salt libs
 import salt.utils.data
 import salt.utils.files
 import salt.utils.json
 import salt.utils.locales
+import salt.utils.path
 import salt.utils.platform
 import salt.utils.stringutils
 import salt.utils.url
@@ -108,6 +122,39 @@ __func_alias__ = {
 VALID_PROTOS = ['http', 'https', 'ftp', 'file']
 
 rex_pip_chain_read = re.compile(r'-r\s(.*)\n?', re.MULTILINE)
+rex_egg_match = re.compile(r'(?:#|#.*?&)egg=([^&]*)')
+
+# Locations of the executables inside a virtualenv
+_IS_WINDOWS = salt.utils.platform.is_windows()
+if _IS_WINDOWS:
+    _PIP_SUBPATH = ('Scripts', 'pip.exe')
+    _PYTHON_SUBPATH = ('Scripts', 'python.exe')
+    _ACTIVATE_SUBPATH = ('Scripts', 'activate.bat')
+else:
+    _PIP_SUBPATH = ('bin', 'pip')
+    _PYTHON_SUBPATH = ('bin', 'python')
+    _ACTIVATE_SUBPATH = ('bin', 'activate')
+
+# Seconds for which list_() and is_installed() reuse the output of pip freeze
+_FREEZE_CACHE_TTL = 2
+
+# install() arguments which map directly onto a pip option, either taking the
+# argument's value or acting as a simple on/off flag
+_INSTALL_VALUE_OPTIONS = (
+    ('build', '--build'),
+    ('target', '--target'),
+    ('download', '--download'),
+    ('source', '--source'),
+)
+_INSTALL_FLAG_OPTIONS = (
+    ('upgrade', '--upgrade'),
+    ('force_reinstall', '--force-reinstall'),
+    ('ignore_installed', '--ignore-installed'),
+    ('no_deps', '--no-deps'),
+    ('no_install', '--no-install'),
+    ('no_download', '--no-download'),
+    ('no_cache_dir', '--no-cache-dir'),
+)
 
 
 def __virtual__():
@@ -119,10 +166,46 @@ def __virtual__():
     return 'pip'
 
 
+def _csv_to_list(value):
+    '''
+    Split a comma separated string into a list of stripped items. Anything
+    other than a string is returned unchanged.
+    '''
+    if isinstance(value, six.string_types):
+        return [item.strip() for item in value.split(',')]
+    return value
+
+
 def _get_pip_bin(bin_env):
     '''
     Locate the pip binary, either from `bin_env` as a virtualenv, as the
     executable itself, or from searching conventional filesystem locations
+
+    The result is cached in ``__context__`` and reused for as long as the
+    modification time of the located binary does not change.
+    '''
+    cache = __context__.setdefault('pip.bin', {})
+    if bin_env in cache:
+        pip_bin, mtime = cache[bin_env]
+        try:
+            if os.path.getmtime(pip_bin) == mtime:
+                return pip_bin
+        except OSError:
+            pass
+        del cache[bin_env]
+
+    pip_bin = _find_pip_bin(bin_env)
+    if pip_bin:
+        try:
+            cache[bin_env] = (pip_bin, os.path.getmtime(pip_bin))
+        except OSError:
+            pass
+    return pip_bin
+
+
+def _find_pip_bin(bin_env):
+    '''
+    Do the actual lookup of the pip binary for :py:func:`_get_pip_bin`
     '''
     if not bin_env:
         which_result = __salt__['cmd.which_bin'](
@@ -130,34 +213,61 @@ def _get_pip_bin(bin_env):
              'pip{0}'.format(sys.version_info[0]),
              'pip', 'pip-python']
         )
-        if salt.utils.platform.is_windows() and six.PY2:
+        if _IS_WINDOWS and six.PY2:
             which_result.encode('string-escape')
         if which_result is None:
             raise CommandNotFoundError('Could not find a `pip` binary')
         return which_result
 
+    # Stat bin_env only once, it is needed to tell a virtualenv from a binary
+    bin_env_mode = _stat_mode(bin_env)
+
     # try to get pip bin from virtualenv, bin_env
-    if os.path.isdir(bin_env):
-        if salt.utils.platform.is_windows():
-            if six.PY2:
-                pip_bin = os.path.join(
-                    bin_env, 'Scripts', 'pip.exe').encode('string-escape')
-            else:
-                pip_bin = os.path.join(bin_env, 'Scripts', 'pip.exe')
-        else:
-            pip_bin = os.path.join(bin_env, 'bin', 'pip')
-        if os.path.isfile(pip_bin):
+    if stat.S_ISDIR(bin_env_mode):
+        pip_bin = os.path.join(bin_env, *_PIP_SUBPATH)
+        if _IS_WINDOWS and six.PY2:
+            pip_bin = pip_bin.encode('string-escape')
+        if stat.S_ISREG(_stat_mode(pip_bin)):
             return pip_bin
         msg = 'Could not find a `pip` binary in virtualenv {0}'.format(bin_env)
         raise CommandNotFoundError(msg)
     # bin_env is the pip binary
     elif os.access(bin_env, os.X_OK):
-        if os.path.isfile(bin_env) or os.path.islink(bin_env):
+        # os.stat() follows symlinks, so this also accepts a link to pip
+        if stat.S_ISREG(bin_env_mode):
             return bin_env
     else:
         raise CommandNotFoundError('Could not find a `pip` binary')
 
 
+def _stat_mode(path):
+    '''
+    Return the ``st_mode`` of ``path``, or ``0`` if it cannot be stat'ed
+    '''
+    try:
+        return os.stat(path).st_mode
+    except OSError:
+        return 0
+
+
+def _get_uv_install_cmd(bin_env):
+    '''
+    Return the ``uv pip install`` command to use for the virtualenv
+    ``bin_env``, or ``None`` if pip should be used instead
+    '''
+    if os.environ.get('SALT_PIP_USE_UV') != '1':
+        return None
+    if not bin_env or not os.path.isdir(bin_env):
+        return None
+
+    uv_bin = salt.utils.path.which('uv')
+    if uv_bin is None:
+        return None
+
+    python_bin = os.path.join(bin_env, *_PYTHON_SUBPATH)
+    return [uv_bin, 'pip', 'install', '--python', python_bin]
+
+
 def _get_cached_requirements(requirements, saltenv):
     '''
     Get the location of a cached requirements file; caching if necessary.
@@ -167,6 +277,15 @@ def _get_cached_requirements(requirements, saltenv):
     if senv:
         saltenv = senv
 
+    # Skip the master round trips if the file was verified recently
+    cache = __context__.setdefault('pip.cached_requirements', {})
+    cache_key = (requirements, saltenv)
+    if cache_key in cache:
+        cached_requirements, timestamp = cache[cache_key]
+        if time.time() - timestamp < _req_cache_ttl() \
+                and os.path.isfile(cached_requirements):
+            return cached_requirements
+
     if req_file not in __salt__['cp.list_master'](saltenv):
         # Requirements file does not exist in the given saltenv.
         return False
@@ -186,9 +305,24 @@ def _get_cached_requirements(requirements, saltenv):
             requirements, saltenv
         )
 
+    if cached_requirements:
+        cache[cache_key] = (cached_requirements, time.time())
+
     return cached_requirements
 
 
+def _req_cache_ttl():
+    '''
+    Return the number of seconds a verified requirements file stays cached.
+    Can be overridden with the ``SALT_PIP_REQ_CACHE_TTL`` environment
+    variable, setting it to ``0`` disables the cache.
+    '''
+    try:
+        return float(os.environ.get('SALT_PIP_REQ_CACHE_TTL', 30))
+    except ValueError:
+        return 30
+
+
 def _get_env_activate(bin_env):
     '''
     Return the path to the activate binary
@@ -197,10 +331,7 @@ def _get_env_activate(bin_env):
         raise CommandNotFoundError('Could not find a `activate` binary')
 
     if os.path.isdir(bin_env):
-        if salt.utils.platform.is_windows():
-            activate_bin = os.path.join(bin_env, 'Scripts', 'activate.bat')
-        else:
-            activate_bin = os.path.join(bin_env, 'bin', 'activate')
+        activate_bin = os.path.join(bin_env, *_ACTIVATE_SUBPATH)
         if os.path.isfile(activate_bin):
             return activate_bin
     raise CommandNotFoundError('Could not find a `activate` binary')
@@ -246,9 +377,8 @@ def _process_requirements(requirements, cmd, cwd, saltenv, user):
     cleanup_requirements = []
 
     if requirements is not None:
-        if isinstance(requirements, six.string_types):
-            requirements = [r.strip() for r in requirements.split(',')]
-        elif not isinstance(requirements, list):
+        requirements = _csv_to_list(requirements)
+        if not isinstance(requirements, list):
             raise TypeError('requirements must be a string or list')
 
         treq = None
@@ -272,8 +402,7 @@ def _process_requirements(requirements, cmd, cwd, saltenv, user):
 
                 if not treq:
                     treq = tempfile.mkdtemp()
-
-                __salt__['file.chown'](treq, user, None)
+                    __salt__['file.chown'](treq, user, None)
 
                 current_directory = None
 
@@ -342,6 +471,83 @@ def _process_requirements(requirements, cmd, cwd, saltenv, user):
     return cleanup_requirements, None
 
 
+def _freeze_raw(bin_env=None, user=None, cwd=None, use_vt=False, force=False):
+    '''
+    Run ``pip freeze`` and return its output lines
+
+    The output is kept in ``__context__`` for ``_FREEZE_CACHE_TTL`` seconds
+    per ``bin_env`` and ``user`` so back to back callers such as
+    :py:func:`list_` only run pip once. ``force=True`` ignores the cached
+    output. Functions changing the installed packages must call
+    :py:func:`_clear_freeze_cache`.
+    '''
+    cache = __context__.setdefault('pip.freeze', {})
+    cache_key = (bin_env, user)
+    if not force and cache_key in cache:
+        lines, timestamp = cache[cache_key]
+        if time.time() - timestamp < _FREEZE_CACHE_TTL:
+            return list(lines)
+
+    pip_bin = _get_pip_bin(bin_env)
+
+    cmd = [pip_bin, 'freeze']
+
+    # Include pip, setuptools, distribute, wheel
+    min_version = '8.0.3'
+    cur_version = version(bin_env)
+    if not salt.utils.versions.compare(ver1=cur_version, oper='>=',
+                                       ver2=min_version):
+        logger.warning(
+            'The version of pip installed is %s, which is older than %s. '
+            'The packages pip, wheel, setuptools, and distribute will not be '
+            'included in the output of pip.freeze', cur_version, min_version
+        )
+    else:
+        cmd.append('--all')
+
+    cmd_kwargs = dict(runas=user, cwd=cwd, use_vt=use_vt, python_shell=False)
+    if bin_env and os.path.isdir(bin_env):
+        cmd_kwargs['env'] = {'VIRTUAL_ENV': bin_env}
+    result = __salt__['cmd.run_all'](cmd, **cmd_kwargs)
+
+    if result['retcode'] > 0:
+        raise CommandExecutionError(result['stderr'])
+
+    lines = result['stdout'].splitlines()
+    cache[cache_key] = (lines, time.time())
+    return list(lines)
+
+
+def _parse_freeze_line(line):
+    '''
+    Return the ``(name, version)`` tuple of a line of ``pip freeze`` output,
+    or ``None`` if the line does not describe a package
+    '''
+    if line.startswith(('-f', '#', '-e hg+not trust')):
+        # ignore -f line as it contains --find-links directory
+        # ignore comment lines
+        # ignore hg + not trust problem
+        return None
+    elif line.startswith('-e'):
+        version_, sep, name = line.partition('-e ')[2].partition('#egg=')
+    else:
+        name, sep, version_ = line.partition('===')
+        if not sep:
+            name, sep, version_ = line.partition('==')
+
+    if not sep:
+        logger.error('Can\'t parse line \'%s\'', line)
+        return None
+    return name, version_
+
+
+def _clear_freeze_cache():
+    '''
+    Drop the ``pip freeze`` output cached by :py:func:`_freeze_raw`
+    '''
+    __context__.pop('pip.freeze', None)
+
+
 def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
             requirements=None,
             bin_env=None,
@@ -567,7 +773,7 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
     '''
     pip_bin = _get_pip_bin(bin_env)
 
-    cmd = [pip_bin, 'install']
+    cmd = _get_uv_install_cmd(bin_env) or [pip_bin, 'install']
 
     cleanup_requirements, error = _process_requirements(
         requirements=requirements,
@@ -633,10 +839,7 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
         cmd.extend(['--timeout', timeout])
 
     if find_links:
-        if isinstance(find_links, six.string_types):
-            find_links = [l.strip() for l in find_links.split(',')]
-
-        for link in find_links:
+        for link in _csv_to_list(find_links):
             if not (salt.utils.url.validate(link, VALID_PROTOS) or os.path.exists(link)):
                 raise CommandExecutionError(
                     '\'{0}\' is not a valid URL or path'.format(link)
@@ -675,42 +878,27 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
                     ' use index_url and/or extra_index_url instead'
             )
 
-        if isinstance(mirrors, six.string_types):
-            mirrors = [m.strip() for m in mirrors.split(',')]
-
         cmd.append('--use-mirrors')
-        for mirror in mirrors:
+        for mirror in _csv_to_list(mirrors):
             if not mirror.startswith('http://'):
                 raise CommandExecutionError(
                     '\'{0}\' is not a valid URL'.format(mirror)
                 )
             cmd.extend(['--mirrors', mirror])
 
-    if build:
-        cmd.extend(['--build', build])
-
-    if target:
-        cmd.extend(['--target', target])
-
-    if download:
-        cmd.extend(['--download', download])
+    install_args = locals()
+    for arg, opt in _INSTALL_VALUE_OPTIONS:
+        if install_args[arg]:
+            cmd.extend([opt, install_args[arg]])
 
     if download_cache or cache_dir:
         cmd.extend(['--cache-dir' if salt.utils.versions.compare(
             ver1=version(bin_env), oper='>=', ver2='6.0'
         ) else '--download-cache', download_cache or cache_dir])
 
-    if source:
-        cmd.extend(['--source', source])
-
-    if upgrade:
-        cmd.append('--upgrade')
-
-    if force_reinstall:
-        cmd.append('--force-reinstall')
-
-    if ignore_installed:
-        cmd.append('--ignore-installed')
+    for arg, opt in _INSTALL_FLAG_OPTIONS:
+        if install_args[arg]:
+            cmd.append(opt)
 
     if exists_action:
         if exists_action.lower() not in ('s', 'i', 'w', 'b'):
@@ -720,18 +908,6 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
             )
         cmd.extend(['--exists-action', exists_action])
 
-    if no_deps:
-        cmd.append('--no-deps')
-
-    if no_install:
-        cmd.append('--no-install')
-
-    if no_download:
-        cmd.append('--no-download')
-
-    if no_cache_dir:
-        cmd.append('--no-cache-dir')
-
     if pre_releases:
         # Check the locally installed pip version
         pip_version = version(pip_bin)
@@ -744,42 +920,31 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
         cmd.extend(['--cert', cert])
 
     if global_options:
-        if isinstance(global_options, six.string_types):
-            global_options = [go.strip() for go in global_options.split(',')]
-
-        for opt in global_options:
+        for opt in _csv_to_list(global_options):
             cmd.extend(['--global-option', opt])
 
     if install_options:
-        if isinstance(install_options, six.string_types):
-            install_options = [io.strip() for io in install_options.split(',')]
-
-        for opt in install_options:
+        for opt in _csv_to_list(install_options):
             cmd.extend(['--install-option', opt])
 
     if pkgs:
         if not isinstance(pkgs, list):
-            try:
-                pkgs = [p.strip() for p in pkgs.split(',')]
-            except AttributeError:
-                pkgs = [p.strip() for p in six.text_type(pkgs).split(',')]
+            if not isinstance(pkgs, six.string_types):
+                pkgs = six.text_type(pkgs)
+            pkgs = _csv_to_list(pkgs)
         pkgs = salt.utils.data.stringify(salt.utils.data.decode_list(pkgs))
 
         # It's possible we replaced version-range commas with semicolons so
         # they would survive the previous line (in the pip.installed state).
         # Put the commas back in while making sure the names are contained in
         # quotes, this allows for proper version spec passing salt>=0.17.0
-        cmd.extend([p.replace(';', ',') for p in pkgs])
+        cmd.extend(p.replace(';', ',') if ';' in p else p for p in pkgs)
 
     if editable:
-        egg_match = re.compile(r'(?:#|#.*?&)egg=([^&]*)')
-        if isinstance(editable, six.string_types):
-            editable = [e.strip() for e in editable.split(',')]
-
-        for entry in editable:
+        for entry in _csv_to_list(editable):
             # Is the editable local?
             if not (entry == '.' or entry.startswith(('file://', '/'))):
-                match = egg_match.search(entry)
+                match = rex_egg_match.search(entry)
 
                 if not match or not match.group(1):
                     # Missing #egg=theEggName
@@ -792,18 +957,11 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
         cmd.append('--allow-all-external')
 
     if allow_external:
-        if isinstance(allow_external, six.string_types):
-            allow_external = [p.strip() for p in allow_external.split(',')]
-
-        for pkg in allow_external:
+        for pkg in _csv_to_list(allow_external):
             cmd.extend(['--allow-external', pkg])
 
     if allow_unverified:
-        if isinstance(allow_unverified, six.string_types):
-            allow_unverified = \
-                [p.strip() for p in allow_unverified.split(',')]
-
-        for pkg in allow_unverified:
+        for pkg in _csv_to_list(allow_unverified):
             cmd.extend(['--allow-unverified', pkg])
 
     if process_dependency_links:
@@ -840,6 +998,7 @@ def install(pkgs=None,  # pylint: disable=R0912,R0913,R0914
 
         return __salt__['cmd.run_all'](cmd, python_shell=False, **cmd_kwargs)
     finally:
+        _clear_freeze_cache()
         for tempdir in [cr for cr in cleanup_requirements if cr is not None]:
             if os.path.isdir(tempdir):
                 shutil.rmtree(tempdir)
@@ -944,10 +1103,9 @@ def uninstall(pkgs=None,
         cmd.extend(['--timeout', timeout])
 
     if pkgs:
-        if isinstance(pkgs, six.string_types):
-            pkgs = [p.strip() for p in pkgs.split(',')]
+        pkgs = _csv_to_list(pkgs)
         if requirements:
-            for requirement in requirements:
+            for requirement in _csv_to_list(requirements):
                 with salt.utils.files.fopen(requirement) as rq_:
                     for req in rq_:
                         req = salt.utils.stringutils.to_unicode(req)
@@ -967,12 +1125,10 @@ def uninstall(pkgs=None,
     try:
         return __salt__['cmd.run_all'](cmd, **cmd_kwargs)
     finally:
-        for requirement in cleanup_requirements:
-            if requirement:
-                try:
-                    os.remove(requirement)
-                except OSError:
-                    pass
+        _clear_freeze_cache()
+        for tempdir in [cr for cr in cleanup_requirements if cr is not None]:
+            if os.path.isdir(tempdir):
+                shutil.rmtree(tempdir)
 
 
 def freeze(bin_env=None,
@@ -1011,32 +1167,8 @@ def freeze(bin_env=None,
         The packages pip, wheel, setuptools, and distribute are included if the
         installed pip is new enough.
     '''
-    pip_bin = _get_pip_bin(bin_env)
-
-    cmd = [pip_bin, 'freeze']
-
-    # Include pip, setuptools, distribute, wheel
-    min_version = '8.0.3'
-    cur_version = version(bin_env)
-    if not salt.utils.versions.compare(ver1=cur_version, oper='>=',
-                                       ver2=min_version):
-        logger.warning(
-            'The version of pip installed is %s, which is older than %s. '
-            'The packages pip, wheel, setuptools, and distribute will not be '
-            'included in the output of pip.freeze', cur_version, min_version
-        )
-    else:
-        cmd.append('--all')
-
-    cmd_kwargs = dict(runas=user, cwd=cwd, use_vt=use_vt, python_shell=False)
-    if bin_env and os.path.isdir(bin_env):
-        cmd_kwargs['env'] = {'VIRTUAL_ENV': bin_env}
-    result = __salt__['cmd.run_all'](cmd, **cmd_kwargs)
-
-    if result['retcode'] > 0:
-        raise CommandExecutionError(result['stderr'])
-
-    return result['stdout'].splitlines()
+    return _freeze_raw(bin_env=bin_env, user=user, cwd=cwd, use_vt=use_vt,
+                       force=True)
 
 
 def list_(prefix=None,
@@ -1066,39 +1198,23 @@ def list_(prefix=None,
         The packages wheel, setuptools, and distribute are included if the
         installed pip is new enough.
     '''
-    packages = {}
+    # Collect (name, version) pairs and build the dict once at the end. A pip
+    # entry from freeze comes later and so overrides pip.version's result.
+    packages = []
 
     if prefix is None or 'pip'.startswith(prefix):
-        packages['pip'] = version(bin_env)
+        packages.append(('pip', version(bin_env)))
 
-    for line in freeze(bin_env=bin_env, user=user, cwd=cwd):
-        if line.startswith('-f') or line.startswith('#'):
-            # ignore -f line as it contains --find-links directory
-            # ignore comment lines
-            continue
-        elif line.startswith('-e hg+not trust'):
-            # ignore hg + not trust problem
-            continue
-        elif line.startswith('-e'):
-            line = line.split('-e ')[1]
-            version_, name = line.split('#egg=')
-        elif len(line.split('===')) >= 2:
-            name = line.split('===')[0]
-            version_ = line.split('===')[1]
-        elif len(line.split('==')) >= 2:
-            name = line.split('==')[0]
-            version_ = line.split('==')[1]
-        else:
-            logger.error('Can\'t parse line \'%s\'', line)
+    prefix_lower = prefix.lower() if prefix else None
+    for line in _freeze_raw(bin_env=bin_env, user=user, cwd=cwd):
+        parsed = _parse_freeze_line(line)
+        if parsed is None:
             continue
 
-        if prefix:
-            if name.lower().startswith(prefix.lower()):
-                packages[name] = version_
-        else:
-            packages[name] = version_
+        if prefix_lower is None or parsed[0].lower().startswith(prefix_lower):
+            packages.append(parsed)
 
-    return packages
+    return dict(packages)
 
 
 def version(bin_env=None):
@@ -1119,7 +1235,7 @@ def version(bin_env=None):
     pip_bin = _get_pip_bin(bin_env)
 
     output = __salt__['cmd.run_stdout'](
-        '{0} --version'.format(pip_bin), python_shell=False)
+        [pip_bin, '--version'], python_shell=False)
     try:
         return re.match(r'^pip (\S+)', output).group(1)
     except AttributeError:
@@ -1149,7 +1265,7 @@ def list_upgrades(bin_env=None,
                                        ver2=min_version):
         cmd.append('--format=json')
 
-    cmd_kwargs = dict(cwd=cwd, runas=user)
+    cmd_kwargs = dict(cwd=cwd, runas=user, python_shell=False)
     if bin_env and os.path.isdir(bin_env):
         cmd_kwargs['env'] = {'VIRTUAL_ENV': bin_env}
 
@@ -1203,29 +1319,13 @@ def is_installed(pkgname=None,
         The packages wheel, setuptools, and distribute are included if the
         installed pip is new enough.
     '''
-    for line in freeze(bin_env=bin_env, user=user, cwd=cwd):
-        if line.startswith('-f') or line.startswith('#'):
-            # ignore -f line as it contains --find-links directory
-            # ignore comment lines
-            continue
-        elif line.startswith('-e hg+not trust'):
-            # ignore hg + not trust problem
-            continue
-        elif line.startswith('-e'):
-            line = line.split('-e ')[1]
-            version_, name = line.split('#egg=')
-        elif len(line.split('===')) >= 2:
-            name = line.split('===')[0]
-            version_ = line.split('===')[1]
-        elif len(line.split('==')) >= 2:
-            name = line.split('==')[0]
-            version_ = line.split('==')[1]
-        else:
-            logger.error('Can\'t parse line \'%s\'', line)
+    for line in _freeze_raw(bin_env=bin_env, user=user, cwd=cwd):
+        parsed = _parse_freeze_line(line)
+        if parsed is None:
             continue
 
         if pkgname:
-            if pkgname == name.lower():
+            if pkgname == parsed[0].lower():
                 return True
 
     return False
@@ -1258,6 +1358,10 @@ def upgrade(bin_env=None,
 
     Upgrades outdated pip packages
 
+    All outdated packages are upgraded in a single pip run. If that run
+    fails, the packages are upgraded one at a time so that a single failing
+    package does not prevent the others from being upgraded.
+
     Returns a dict containing the changes.
 
         {'<package>':  {'old': '<old-version>',
@@ -1279,18 +1383,31 @@ def upgrade(bin_env=None,
     old = list_(bin_env=bin_env, user=user, cwd=cwd)
 
     cmd = [pip_bin, 'install', '-U']
-    cmd_kwargs = dict(cwd=cwd, use_vt=use_vt)
+    cmd_kwargs = dict(cwd=cwd, use_vt=use_vt, python_shell=False)
     if bin_env and os.path.isdir(bin_env):
         cmd_kwargs['env'] = {'VIRTUAL_ENV': bin_env}
-    errors = False
-    for pkg in list_upgrades(bin_env=bin_env, user=user, cwd=cwd):
-        result = __salt__['cmd.run_all'](cmd + [pkg], **cmd_kwargs)
-        if result['retcode'] != 0:
-            errors = True
-        if 'stderr' in result:
-            ret['comment'] += result['stderr']
-    if errors:
-        ret['result'] = False
+    # Upgrade everything in one pip run instead of starting pip per package
+    pkgs = list(list_upgrades(bin_env=bin_env, user=user, cwd=cwd))
+    if pkgs:
+        result = __salt__['cmd.run_all'](cmd + pkgs, **cmd_kwargs)
+        if result['retcode'] != 0 and len(pkgs) > 1:
+            # pip aborts the whole run if a single package fails, retry the
+            # packages one by one so the others still get upgraded
+            errors = False
+            for pkg in pkgs:
+                result = __salt__['cmd.run_all'](cmd + [pkg], **cmd_kwargs)
+                if result['retcode'] != 0:
+                    errors = True
+                if 'stderr' in result:
+                    ret['comment'] += result['stderr']
+            if errors:
+                ret['result'] = False
+        else:
+            if result['retcode'] != 0:
+                ret['result'] = False
+            if 'stderr' in result:
+                ret['comment'] += result['stderr']
+        _clear_freeze_cache()
 
     new = list_(bin_env=bin_env, user=user, cwd=cwd)
 
@@ -1344,7 +1461,8 @@ def list_all_versions(pkg,
 
     cmd = [pip_bin, 'install', '{0}==versions'.format(pkg)]
 
-    cmd_kwargs = dict(cwd=cwd, runas=user, output_loglevel='quiet', redirect_stderr=True)
+    cmd_kwargs = dict(cwd=cwd, runas=user, output_loglevel='quiet',
+                      redirect_stderr=True, python_shell=False)
     if bin_env and os.path.isdir(bin_env):
         cmd_kwargs['env'] = {'VIRTUAL_ENV': bin_env}
 
@@ -1362,6 +1480,9 @@ def list_all_versions(pkg,
     else:
         excludes = re.compile(r'')
 
+    # pkg_resources is slow to import, only load it when it is needed
+    import pkg_resources
+
     versions = []
     for line in result['stdout'].splitlines():
         match = re.search(r'\s*Could not find a version.* \(from versions: (.*)\)', line)
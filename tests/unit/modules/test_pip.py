@@ -3,6 +3,9 @@
 # Import python libs
 from __future__ import absolute_import
 import os
+import shutil
+import stat
+import tempfile
 
 # Import Salt Testing libs
 from tests.support.mixins import LoaderModuleMockMixin
@@ -10,6 +13,7 @@ from tests.support.unit import skipIf, TestCase
 from tests.support.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
 
 # Import salt libs
+import salt.utils.files
 import salt.utils.platform
 import salt.modules.pip as pip
 from salt.exceptions import CommandExecutionError
@@ -284,8 +288,13 @@ class PipTestCase(TestCase, LoaderModuleMockMixin):
                 )
 
     def test_install_venv(self):
-        with patch('os.path') as mock_path:
-            mock_path.is_file.return_value = True
+        def fake_stat(path):
+            # os.path is mocked below, so no os.path.basename() here
+            if path.endswith(('pip', 'pip.exe')):
+                return MagicMock(st_mode=stat.S_IFREG)
+            return MagicMock(st_mode=stat.S_IFDIR)
+
+        with patch('os.path') as mock_path, patch('os.stat', fake_stat):
             mock_path.isdir.return_value = True
 
             pkg = 'mock'
@@ -1019,6 +1028,8 @@ class PipTestCase(TestCase, LoaderModuleMockMixin):
                 )
 
         # Non zero returncode raises exception?
+        # (drop the freeze output cached by the previous call first)
+        pip.__context__.clear()
         mock = MagicMock(return_value={'retcode': 1, 'stderr': 'CABOOOOMMM!'})
         with patch.dict(pip.__salt__, {'cmd.run_all': mock}):
             with patch('salt.modules.pip.version',
@@ -1067,6 +1078,8 @@ class PipTestCase(TestCase, LoaderModuleMockMixin):
                 )
 
         # Non zero returncode raises exception?
+        # (drop the freeze output cached by the previous call first)
+        pip.__context__.clear()
         mock = MagicMock(return_value={'retcode': 1, 'stderr': 'CABOOOOMMM!'})
         with patch.dict(pip.__salt__, {'cmd.run_all': mock}):
             with patch('salt.modules.pip.version',
@@ -1128,6 +1141,7 @@ class PipTestCase(TestCase, LoaderModuleMockMixin):
                     ['pip', 'list', '--outdated'],
                     cwd=None,
                     runas=None,
+                    python_shell=False,
                 )
                 self.assertEqual(
                     ret, {
@@ -1156,6 +1170,7 @@ class PipTestCase(TestCase, LoaderModuleMockMixin):
                     ['pip', 'list', '--outdated', '--format=json'],
                     cwd=None,
                     runas=None,
+                    python_shell=False,
                 )
                 self.assertEqual(
                     ret, {
@@ -1253,3 +1268,166 @@ class PipTestCase(TestCase, LoaderModuleMockMixin):
                     use_vt=False,
                     python_shell=False,
                 )
+
+    def test_get_pip_bin_is_cached(self):
+        fd_, pip_bin = tempfile.mkstemp()
+        os.close(fd_)
+        try:
+            mock = MagicMock(return_value=pip_bin)
+            with patch.dict(pip.__salt__, {'cmd.which_bin': mock}):
+                self.assertEqual(pip._get_pip_bin(None), pip_bin)
+                self.assertEqual(pip._get_pip_bin(None), pip_bin)
+                self.assertEqual(mock.call_count, 1)
+
+                # A changed binary is looked up again
+                os.utime(pip_bin, (0, 0))
+                self.assertEqual(pip._get_pip_bin(None), pip_bin)
+                self.assertEqual(mock.call_count, 2)
+        finally:
+            os.remove(pip_bin)
+
+    def test_get_cached_requirements_skips_recent_hash_check(self):
+        fd_, cached = tempfile.mkstemp()
+        os.close(fd_)
+        try:
+            list_master = MagicMock(return_value=['requirements.txt'])
+            hash_file = MagicMock(return_value={'hsum': 'abc'})
+            with patch.dict(pip.__salt__, {'cp.list_master': list_master,
+                                           'cp.is_cached': MagicMock(return_value=cached),
+                                           'cp.hash_file': hash_file}):
+                for _ in range(2):
+                    self.assertEqual(
+                        pip._get_cached_requirements('salt://requirements.txt', 'base'),
+                        cached
+                    )
+                self.assertEqual(list_master.call_count, 1)
+                self.assertEqual(hash_file.call_count, 2)
+
+                with patch.dict(os.environ, {'SALT_PIP_REQ_CACHE_TTL': '0'}):
+                    pip._get_cached_requirements('salt://requirements.txt', 'base')
+                self.assertEqual(list_master.call_count, 2)
+        finally:
+            os.remove(cached)
+
+    def test_upgrade_runs_pip_once(self):
+        mock = MagicMock(return_value={'retcode': 0, 'stdout': '', 'stderr': ''})
+        upgrades = {'appdirs': '1.4.3', 'awscli': '1.12.1'}
+        with patch.dict(pip.__salt__, {'cmd.run_all': mock}):
+            with patch('salt.modules.pip.list_',
+                       MagicMock(return_value={})), \
+                    patch('salt.modules.pip.list_upgrades',
+                          MagicMock(return_value=upgrades)):
+                ret = pip.upgrade()
+                mock.assert_called_once_with(
+                    ['pip', 'install', '-U'] + list(upgrades),
+                    cwd=None,
+                    use_vt=False,
+                    python_shell=False,
+                )
+                self.assertTrue(ret['result'])
+
+    def test_install_uses_uv_when_enabled(self):
+        venv_path = os.path.join(os.sep, 'test_env')
+        if salt.utils.platform.is_windows():
+            python_bin = os.path.join(venv_path, 'Scripts', 'python.exe')
+        else:
+            python_bin = os.path.join(venv_path, 'bin', 'python')
+        mock = MagicMock(return_value={'retcode': 0, 'stdout': ''})
+        with patch.dict(pip.__salt__, {'cmd.run_all': mock}), \
+                patch.dict(os.environ, {'SALT_PIP_USE_UV': '1'}), \
+                patch('salt.modules.pip._get_pip_bin',
+                      MagicMock(return_value='pip')), \
+                patch('salt.utils.path.which',
+                      MagicMock(return_value='/usr/bin/uv')), \
+                patch('os.path.isdir', MagicMock(return_value=True)):
+            pip.install('pep8', bin_env=venv_path)
+            mock.assert_called_once_with(
+                ['/usr/bin/uv', 'pip', 'install', '--python', python_bin,
+                 'pep8'],
+                env={'VIRTUAL_ENV': venv_path},
+                saltenv='base',
+                runas=None,
+                use_vt=False,
+                python_shell=False,
+            )
+
+    def test_list_reuses_recent_freeze_output(self):
+        mock = MagicMock(return_value={'retcode': 0, 'stdout': 'pycrypto==2.6'})
+        with patch.dict(pip.__salt__, {'cmd.run_all': mock}):
+            with patch('salt.modules.pip.version',
+                       MagicMock(return_value='6.1.1')):
+                pip.list_()
+                self.assertEqual(pip.list_(prefix='py'), {'pycrypto': '2.6'})
+                self.assertEqual(mock.call_count, 1)
+
+                # Installing something invalidates the cached output
+                pip.install('pep8')
+                pip.list_()
+                self.assertEqual(mock.call_count, 3)
+
+                # freeze always runs pip
+                pip.freeze()
+                self.assertEqual(mock.call_count, 4)
+
+    def test_upgrade_retries_packages_one_by_one_on_failure(self):
+        upgrades = {'appdirs': '1.4.3', 'awscli': '1.12.1'}
+        pkgs = list(upgrades)
+        mock = MagicMock(side_effect=[
+            {'retcode': 1, 'stdout': '', 'stderr': 'batch failed'},
+            {'retcode': 0, 'stdout': '', 'stderr': ''},
+            {'retcode': 1, 'stdout': '', 'stderr': 'single failed'},
+        ])
+        with patch.dict(pip.__salt__, {'cmd.run_all': mock}):
+            with patch('salt.modules.pip.list_',
+                       MagicMock(return_value={})), \
+                    patch('salt.modules.pip.list_upgrades',
+                          MagicMock(return_value=upgrades)):
+                ret = pip.upgrade()
+                self.assertEqual(
+                    [call[0][0] for call in mock.call_args_list],
+                    [['pip', 'install', '-U'] + pkgs,
+                     ['pip', 'install', '-U', pkgs[0]],
+                     ['pip', 'install', '-U', pkgs[1]]]
+                )
+                self.assertFalse(ret['result'])
+                self.assertEqual(ret['comment'], 'single failed')
+
+    def test_uninstall_pkgs_with_comma_separated_requirements(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            req_a = os.path.join(tmpdir, 'a.txt')
+            req_b = os.path.join(tmpdir, 'b.txt')
+            for path, content in ((req_a, 'pep8==1.0\n'),
+                                  (req_b, 'six==1.10.0\n')):
+                with salt.utils.files.fopen(path, 'w') as fp_:
+                    fp_.write(content)
+
+            mock = MagicMock(return_value={'retcode': 0, 'stdout': ''})
+            with patch.dict(pip.__salt__, {'cmd.run_all': mock}):
+                pip.uninstall(pkgs='pep8,six,requests',
+                              requirements=','.join((req_a, req_b)))
+                # Packages listed in the requirements files are not repeated
+                mock.assert_called_once_with(
+                    ['pip', 'uninstall', '-y',
+                     '--requirement', req_a, '--requirement', req_b,
+                     'requests'],
+                    cwd=None,
+                    saltenv='base',
+                    runas=None,
+                    use_vt=False,
+                    python_shell=False,
+                )
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_uninstall_removes_runas_requirements_dir(self):
+        treq = os.path.join(os.sep, 'tmp', 'treq')
+        mock = MagicMock(return_value={'retcode': 0, 'stdout': ''})
+        rmtree = MagicMock()
+        with patch.dict(pip.__salt__, {'cmd.run_all': mock}), \
+                patch('salt.modules.pip._process_requirements',
+                      MagicMock(return_value=([treq], None))), \
+                patch('os.path.isdir', MagicMock(return_value=True)), \
+                patch('shutil.rmtree', rmtree):
+            pip.uninstall(requirements='requirements.txt', user='foo')
+            rmtree.assert_called_once_with(treq)